@@ -0,0 +1,64 @@
+"""Here is the image cache for the "Asteroids" game. Sprites are loaded from disk and scaled to the size they will be
+drawn at only once. Every later request for the same image at the same size returns the shared Surface, so creating
+a new Laser or Asteroid object costs no loading, scaling or rotating. Once a display has been opened, cached images
+are also converted to the pixel format of the display so that blitting them is as cheap as possible.
+"""
+
+import pygame
+
+_images = {}  # Maps (path, size) to a loaded and scaled pygame.Surface
+_rotations = {}  # Maps (path, size, count) to a tuple of rotation frames
+
+
+def load_image(path, size):
+    """Returns the image at 'path' scaled to 'size', loading and scaling it only on the first request.
+
+    :param path: a str representing the path of the image file.
+    :param size: a tuple or list containing two ints: the width and height to scale the image to.
+    :return: a pygame.Surface object which is shared by every caller. It must not be drawn onto.
+    """
+
+    key = (path, tuple(size))
+    image = _images.get(key)
+    if image is None:
+        image = pygame.transform.scale(pygame.image.load(path), key[1])
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        _images[key] = image
+    return image
+
+
+def load_rotation_frames(path, size, count):
+    """Returns 'count' frames of the image at 'path', scaled to 'size' and rotated by evenly spaced angles through
+    one full turn. The frames are rendered only on the first request.
+
+    A rotated image is larger than the original, so each frame comes with the offset at which it must be drawn from
+    the top left corner of an unrotated 'size' rectangle to stay centred on it.
+
+    :param path: a str representing the path of the image file.
+    :param size: a tuple or list containing two ints: the width and height to scale the image to.
+    :param count: an int representing the amount of frames.
+    :return: a tuple of (pygame.Surface, (x offset, y offset)) tuples, shared by every caller.
+    """
+
+    key = (path, tuple(size), count)
+    frames = _rotations.get(key)
+    if frames is None:
+        image = load_image(path, size)
+        frames = []
+        for i in range(count):
+            frame = pygame.transform.rotozoom(image, 360 * i / count, 1)
+            if pygame.display.get_surface() is not None:
+                frame = frame.convert_alpha()
+            offset = ((size[0] - frame.get_width()) // 2, (size[1] - frame.get_height()) // 2)
+            frames.append((frame, offset))
+        frames = tuple(frames)
+        _rotations[key] = frames
+    return frames
+
+
+def clear_cache():
+    """Forgets every cached image, e.g. after the display has been recreated with a different pixel format."""
+
+    _images.clear()
+    _rotations.clear()
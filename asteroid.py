@@ -1,10 +1,12 @@
 """Here is the 'Asteroid' class for the "Asteroids" game. This class can be used to create Asteroid objects
 which move downwards across the window towards the user's ship. When asteroids come into contact with
 the ship, the ship is destroyed. When asteroids come into contact with a laser, the asteroid is destroyed.
-Each Asteroid object has a size, a location, and a velocity.
+Each Asteroid object has a size, a location, a velocity, and a spin. Asteroids tumble as they move, by stepping
+through a set of rotation frames which are rendered once and shared by every asteroid of the same size.
 """
 
 import pygame
+from assets import load_rotation_frames
 
 
 class Asteroid:
@@ -18,7 +20,7 @@ class Asteroid:
 
         cls.window = window
 
-    def __init__(self, size, location, velocity):
+    def __init__(self, size, location, velocity, spin, rotation_frames):
         """Initializes an instance of the Asteroid class.
 
         :param size: an int representing the diameter of the asteroid.
@@ -26,23 +28,30 @@ class Asteroid:
         asteroid while the second digit is for the y-coordinate.
         :param velocity:  a tuple or list containing two ints: the first digit represents the lateral velocity of the
         asteroid while the second digit is for the vertical velocity.
+        :param spin: an int representing the amount of rotation frames the asteroid turns by each move. Negative
+        values turn it clockwise.
+        :param rotation_frames: an int representing the amount of rotation frames for one full turn.
         """
 
         self.velocity = velocity
+        self.spin = spin
+        self.frame = 0  # The index of the current rotation frame
         self.asteroid_rect = pygame.Rect(location[0], location[1], size, size)
-        self.asteroid_img = pygame.transform.scale(pygame.image.load("images/asteroid.png"), (size, size))
+        self.frames = load_rotation_frames("images/asteroid.png", (size, size), rotation_frames)
 
     def move(self):
         """Move the asteroid 'self.velocity[0]' units in the lateral direction, and 'self.velocity[1]' units in the
-        vertical direction.
+        vertical direction. Turns the asteroid by 'self.spin' rotation frames.
         """
 
         self.asteroid_rect.move_ip(self.velocity[0], self.velocity[1])
+        self.frame = (self.frame + self.spin) % len(self.frames)
 
     def draw(self):
-        """Draws the asteroid onto the game window."""
+        """Draws the current rotation frame of the asteroid onto the game window, centred on the asteroid."""
 
-        Asteroid.window.get_surface().blit(self.asteroid_img, self.asteroid_rect)
+        image, offset = self.frames[self.frame]
+        Asteroid.window.get_surface().blit(image, (self.asteroid_rect.x + offset[0], self.asteroid_rect.y + offset[1]))
 
     def get_rect(self):
         """Returns the rectangle object which represents the asteroid.
@@ -53,7 +62,8 @@ class Asteroid:
         return self.asteroid_rect
 
     def check_collide(self, other_rect):
-        """ Checks to see if 'other_rect' is overlapping with the rectangle which represents the asteroid.
+        """ Checks to see if 'other_rect' is overlapping with the rectangle which represents the asteroid. The
+        rectangle does not turn with the asteroid.
 
         :param other_rect: a pygame.Rect object
         :return: returns True if if 'self.asteroid_rect' has overlapped with 'other_rect'. False otherwise.
@@ -0,0 +1,62 @@
+"""Here is the render benchmark for the "Asteroids" game. The game is always drawn at the logical resolution used by
+'main.py', then scaled once onto displays of several sizes. For each display size, the average cost of drawing and
+presenting one frame of a busy late-game scene is printed. Run this file directly; no window needs to be visible.
+"""
+
+import os
+import time
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from assets import clear_cache
+from graphic_support_mod import Window
+from game import Game
+from main import LOGICAL_SIZE
+
+DISPLAY_SIZES = [("700x700", (700, 700)), ("1080p", (1920, 1080)), ("4K", (3840, 2160))]
+FRAMES = 200
+ASTEROID_COUNT = 60
+
+
+def benchmark(display_size, smooth):
+    """Times FRAMES calls to Game.draw() on a display of 'display_size'.
+
+    :param display_size: a (width, height) tuple of ints.
+    :param smooth: a Boolean indicating if the frame should be smoothly scaled onto the display.
+    :return: the average cost of one frame in milliseconds.
+    """
+
+    random.seed(0)
+    window = Window('Asteroids benchmark', display_size[0], display_size[1], LOGICAL_SIZE, smooth)
+    game = Game(window)
+    game.fill_screen_w_stars()
+    game.asteroid_buffer = 0
+    while len(game.asteroid_list) < ASTEROID_COUNT:
+        game.create_asteroids()
+        game.clock += 1
+    for asteroid in game.asteroid_list:
+        asteroid.get_rect().y = random.randint(0, LOGICAL_SIZE[1])
+
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        game.draw()
+        game.clock += 1
+    elapsed = time.perf_counter() - start
+    window.close()
+    clear_cache()  # The next display is created anew, so images converted for this one are not reused
+    return elapsed / FRAMES * 1000
+
+
+def main():
+    """Prints the average frame cost for each display size, with and without smooth scaling."""
+
+    print("logical size %dx%d, %d frames, %d asteroids" % (LOGICAL_SIZE + (FRAMES, ASTEROID_COUNT)))
+    for name, display_size in DISPLAY_SIZES:
+        for smooth in (False, True):
+            cost = benchmark(display_size, smooth)
+            print("%-8s %-12s %7.3f ms/frame" % (name, "smoothscale" if smooth else "scale", cost))
+
+
+if __name__ == '__main__':
+    main()
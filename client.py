@@ -0,0 +1,504 @@
+"""Here is the 'ViewerClient' class for the "Asteroids" game. A ViewerClient connects to a GameServer (see
+'server.py'), decodes the state it streams every tick, and acknowledges each tick so the next one can be sent as a
+delta. 'draw_view()' draws a decoded state through a Window, without running a Game.
+
+Running this file opens a window which watches, or with '--play' plays, the game on a server. Running it with
+'--check' starts a server and many viewers on loopback, checks every viewer sees exactly the server's state, even when
+acknowledgements arrive ticks late, checks viewers slower than the server do not fall further and further behind, and
+prints the bandwidth used per client and the latency of each tick.
+"""
+
+import os
+import sys
+import time
+import zlib
+import asyncio
+import argparse
+from collections import OrderedDict
+import pygame
+from assets import load_image, load_rotation_frames
+from savestate import xor_delta
+from server import (HELLO, CONFIG, STATE, ACK, INPUT, VIEWER, PLAYER, LEFT, RIGHT, FIRE, NO_BASE, HELLO_MESSAGE,
+                    CONFIG_MESSAGE, STATE_MESSAGE, ACK_MESSAGE, INPUT_MESSAGE, read_view_state)
+
+
+class ViewerClient:
+
+    def __init__(self, role=VIEWER):
+        """Initializes an instance of the ViewerClient class.
+
+        :param role: VIEWER to only watch, or PLAYER to also send the keys which control the ship.
+        """
+
+        self.role = role
+        self.reader = None
+        self.writer = None
+        self.config = None  # A dict of the sizes sent by the server
+        self.states = OrderedDict()  # Maps each recently decoded tick to its view state, as bases for deltas
+        self.latest = None  # The newest view state, as bytes
+        self.keys = 0
+        self.bytes_received = 0
+        self.states_received = 0
+        self.latencies = []  # The seconds between the server sending each state and this client decoding it
+        self.arrived = asyncio.Event()  # Set by 'follow()' whenever a state has been decoded
+
+    async def connect(self, host, port):
+        """Connects to a server over TCP.
+
+        :param host: a str representing the address of the server.
+        :param port: an int representing the port of the server.
+        """
+
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        await self.handshake()
+
+    async def connect_unix(self, path):
+        """Connects to a server over a Unix socket.
+
+        :param path: a str representing the path of the socket.
+        """
+
+        self.reader, self.writer = await asyncio.open_unix_connection(path)
+        await self.handshake()
+
+    async def handshake(self):
+        """Sends HELLO, and reads the CONFIG answered by the server."""
+
+        self.writer.write(HELLO_MESSAGE.pack(HELLO, self.role))
+        values = CONFIG_MESSAGE.unpack(await self.reader.readexactly(CONFIG_MESSAGE.size))
+        if values[0] != CONFIG:
+            raise ConnectionError("expected CONFIG from the server, got message type %d" % values[0])
+        names = ("width", "height", "ship_width", "ship_height", "laser_width", "laser_height", "asteroid_size",
+                 "rotation_frames", "star_size", "history")
+        self.config = dict(zip(names, values[1:]))
+
+    async def receive(self):
+        """Reads and decodes the next STATE from the server, then acknowledges it.
+
+        :return: the decoded view (see 'server.read_view_state()').
+        """
+
+        header = await self.reader.readexactly(STATE_MESSAGE.size)
+        message_type, tick, base, sent_at, length = STATE_MESSAGE.unpack(header)
+        if message_type != STATE:
+            raise ConnectionError("expected STATE from the server, got message type %d" % message_type)
+        payload = zlib.decompress(await self.reader.readexactly(length))
+        data = payload if base == NO_BASE else xor_delta(payload, self.states[base])
+
+        # The server only uses the newest acknowledged tick as a base, so older ones are no longer needed. A whole
+        # state says nothing about which acknowledgements have arrived, so nothing is dropped for it.
+        if base != NO_BASE:
+            while self.states and next(iter(self.states)) < base:
+                self.states.popitem(last=False)
+        self.states[tick] = data
+        # Ticks which have fallen out of the server's history are never used as bases again
+        while next(iter(self.states)) <= tick - self.config["history"]:
+            self.states.popitem(last=False)
+        self.latest = data
+        self.acknowledge(tick)
+
+        self.bytes_received += len(header) + length
+        self.states_received += 1
+        self.latencies.append(time.time() - sent_at)
+        return read_view_state(data)
+
+    async def follow(self):
+        """Decodes and acknowledges every state as soon as it arrives, until the connection closes, and sets
+        'self.arrived' after each one. A display slower than the server may draw 'self.latest' whenever 'self.arrived'
+        is set, skipping the states it had no time for instead of falling further and further behind.
+        """
+
+        try:
+            while True:
+                await self.receive()
+                self.arrived.set()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.arrived.set()
+
+    def acknowledge(self, tick):
+        """Tells the server this client has decoded 'tick', so later ticks may be sent as deltas against it.
+
+        :param tick: an int server tick.
+        """
+
+        self.writer.write(ACK_MESSAGE.pack(ACK, tick))
+
+    def send_keys(self, keys):
+        """Sends the LEFT/RIGHT/FIRE flags held by the player, if they have changed.
+
+        :param keys: an int made by adding together LEFT, RIGHT and FIRE.
+        """
+
+        if keys != self.keys:
+            self.writer.write(INPUT_MESSAGE.pack(INPUT, keys))
+            self.keys = keys
+
+    async def close(self):
+        """Closes the connection."""
+
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    def get_metrics(self):
+        """Returns the bandwidth used and the latency seen by this client.
+
+        :return: a dict of 'bytes_received', 'states_received', 'bytes_per_state', and the mean and worst
+        'latency_ms'.
+        """
+
+        latencies = self.latencies or [0.0]
+        return {"bytes_received": self.bytes_received, "states_received": self.states_received,
+                "bytes_per_state": self.bytes_received / max(self.states_received, 1),
+                "latency_ms_mean": sum(latencies) / len(latencies) * 1000, "latency_ms_max": max(latencies) * 1000}
+
+
+def draw_view(window, config, view):
+    """Draws a decoded view the way 'Game.draw()' draws the game.
+
+    :param window: the pygame support module window object
+    :param config: the dict of sizes sent by the server.
+    :param view: a decoded view (see 'server.read_view_state()').
+    """
+
+    surface = window.get_surface()
+    ship_size = (config["ship_width"], config["ship_height"])
+    laser_img = load_image("images/ship_laser.png", (config["laser_width"], config["laser_height"]))
+    asteroid_frames = load_rotation_frames("images/asteroid.png", (config["asteroid_size"], config["asteroid_size"]),
+                                           config["rotation_frames"])
+    white = pygame.Color("white")
+
+    window.clear()
+
+    score = str(view["score"])
+    window.draw_string(score, window.get_width() - window.get_string_width(score), 0)
+
+    ship_img = "images/ship_1.png" if view["tick"] % 2 == 0 else "images/ship_2.png"
+    surface.blit(load_image(ship_img, ship_size), view["ship"])
+
+    lasers = view["lasers"]
+    for i in range(0, len(lasers), 2):
+        surface.blit(laser_img, (lasers[i], lasers[i + 1]))
+
+    stars = view["stars"]
+    size = config["star_size"]
+    for i in range(0, len(stars), 2):
+        pygame.draw.rect(surface, white, (stars[i], stars[i + 1], size, size))
+
+    asteroids = view["asteroids"]
+    for i in range(0, len(asteroids), 3):
+        image, offset = asteroid_frames[asteroids[i + 2] % len(asteroid_frames)]
+        surface.blit(image, (asteroids[i] + offset[0], asteroids[i + 1] + offset[1]))
+
+    window.update()
+
+
+async def watch(host, port, unix_path, play, display_size):
+    """Connects to a server and draws its stream in a window until the window is closed.
+
+    :param play: a Boolean. If True, the arrow keys and space bar control the ship.
+    :param display_size: an optional (width, height) tuple of ints giving the size of the display.
+    """
+
+    from graphic_support_mod import Window
+
+    client = ViewerClient(PLAYER if play else VIEWER)
+    if unix_path:
+        await client.connect_unix(unix_path)
+    else:
+        await client.connect(host, port)
+
+    logical_size = (client.config["width"], client.config["height"])
+    display_size = display_size or logical_size
+    window = Window('Asteroids viewer', display_size[0], display_size[1], logical_size)
+    follower = asyncio.ensure_future(client.follow())
+    try:
+        while True:
+            await client.arrived.wait()
+            client.arrived.clear()
+            if follower.done() or pygame.event.poll().type == pygame.QUIT:
+                break
+            if play:
+                pressed = pygame.key.get_pressed()
+                client.send_keys(LEFT * pressed[pygame.K_LEFT] + RIGHT * pressed[pygame.K_RIGHT] +
+                                 FIRE * pressed[pygame.K_SPACE])
+            # Only the newest state is drawn; any decoded while the last frame was drawn are skipped
+            draw_view(window, client.config, read_view_state(client.latest))
+    finally:
+        follower.cancel()
+        await client.close()
+        window.close()
+
+
+async def loopback_check(viewers=200, ticks=250, unix_path=None):
+    """Runs a server and 'viewers' clients on loopback for 'ticks' ticks. One client plays, firing and moving right.
+    Checks that every client decoded exactly the view state the server packed.
+
+    :param viewers: an int representing the amount of clients to connect.
+    :param ticks: an int representing the amount of ticks to run the server for.
+    :param unix_path: an optional str path. If given, clients connect over a Unix socket instead of TCP.
+    :return: a dict of the server metrics, with the client metrics averaged over every client.
+    """
+
+    from server import GameServer, create_headless_window
+    from game import Game
+
+    window = create_headless_window()
+    server = GameServer(lambda: Game(window))
+    if unix_path:
+        await server.start_unix(unix_path)
+    else:
+        host, port = await server.start()
+
+    clients = [ViewerClient(PLAYER if i == 0 else VIEWER) for i in range(viewers)]
+    for client in clients:
+        if unix_path:
+            await client.connect_unix(unix_path)
+        else:
+            await client.connect(host, port)
+    clients[0].send_keys(RIGHT | FIRE)
+    while len(server.connections) < viewers:
+        await asyncio.sleep(0.01)
+
+    async def follow(client):
+        try:
+            while True:
+                view = await client.receive()
+                if view["tick"] == ticks:
+                    return
+        except asyncio.IncompleteReadError:
+            pass
+
+    followers = asyncio.gather(*[follow(client) for client in clients])
+    await server.run(ticks)
+    await asyncio.wait_for(followers, 10)
+
+    expected = server.history[ticks]
+    for client in clients:
+        assert client.latest == expected, "a client decoded a state which differs from the server's"
+        assert len(client.states) <= client.config["history"], "a client kept bases the server no longer has"
+    metrics = server.get_metrics()
+    for name in ("bytes_received", "states_received", "bytes_per_state", "latency_ms_mean"):
+        metrics[name] = sum(client.get_metrics()[name] for client in clients) / viewers
+    metrics["latency_ms_max"] = max(client.get_metrics()["latency_ms_max"] for client in clients)
+    metrics["raw_bytes_per_state"] = len(expected)
+    metrics["score"] = server.game.score
+
+    for client in clients:
+        await client.close()
+    await server.close()
+    window.close()
+    return metrics
+
+
+async def delayed_ack_check(ticks=60, delay=3, history=16):
+    """Steps a server by hand with one client whose acknowledgements reach the server 'delay' ticks late, as they
+    would over a network round trip longer than a tick. Checks that the client decodes every tick, including deltas
+    against ticks acknowledged while newer whole states were already on their way, and that it never keeps more
+    bases than the server's history holds.
+
+    :param ticks: an int representing the amount of ticks to step.
+    :param delay: an int representing the amount of ticks each acknowledgement is held back. From 'history' - 1 up
+    every state is sent whole; it must be less than 'history', or the server skips states for the client.
+    :param history: an int representing the amount of recent ticks the server keeps as delta bases.
+    :return: the amount of states which were sent as deltas.
+    """
+
+    from server import GameServer, create_headless_window
+    from game import Game
+
+    class DelayedAckClient(ViewerClient):
+        """A ViewerClient which sends each acknowledgement only after 'delay' more states have been decoded."""
+
+        def __init__(self):
+            super().__init__()
+            self.held = []
+
+        def acknowledge(self, tick):
+            self.held.append(tick)
+            if len(self.held) > delay:
+                super().acknowledge(self.held.pop(0))
+
+    window = create_headless_window()
+    server = GameServer(lambda: Game(window), history=history)
+    host, port = await server.start()
+    client = DelayedAckClient()
+    await client.connect(host, port)
+    while not server.connections:
+        await asyncio.sleep(0.01)
+    connection = server.connections[0]
+
+    deltas = 0
+    for tick in range(ticks):
+        server.step()
+        server.broadcast()
+        if connection.acked in server.history:
+            deltas += 1
+        await client.receive()
+        assert client.latest == server.history[server.tick], "the client decoded tick %d wrongly" % server.tick
+        assert len(client.states) <= history, "the client kept %d bases" % len(client.states)
+        expected_ack = server.tick - delay
+        while expected_ack > 0 and connection.acked != expected_ack:
+            await asyncio.sleep(0.001)
+
+    assert deltas > 0 or delay >= history - 1, "no states were sent as deltas"
+    await client.close()
+    await server.close()
+    window.close()
+    return deltas
+
+
+async def player_check():
+    """Connects two clients which both ask to play. Checks that only the first one steers the ship, and that the ship
+    stops once the player disconnects.
+    """
+
+    from server import GameServer, create_headless_window
+    from game import Game
+
+    async def settle(condition):
+        while not condition():
+            await asyncio.sleep(0.001)
+
+    window = create_headless_window()
+    server = GameServer(lambda: Game(window))
+    host, port = await server.start()
+    first, second = ViewerClient(PLAYER), ViewerClient(PLAYER)
+    await first.connect(host, port)
+    await settle(lambda: len(server.connections) == 1)
+    await second.connect(host, port)
+    await settle(lambda: len(server.connections) == 2)
+    assert [connection.role for connection in server.connections] == [PLAYER, VIEWER], \
+        "a second client was let in as the player"
+
+    first.send_keys(RIGHT | FIRE)
+    await settle(lambda: server.keys == RIGHT | FIRE)
+    second.send_keys(LEFT)
+    await asyncio.sleep(0.05)
+    assert server.keys == RIGHT | FIRE, "a viewer changed the keys of the player"
+
+    await first.close()
+    await settle(lambda: len(server.connections) == 1)
+    assert server.keys == 0 and server.player is None, "the player's keys were kept after it disconnected"
+
+    await second.close()
+    await server.close()
+    window.close()
+
+
+async def slow_client_check(ticks=200, history=16, frame_time=0.03):
+    """Runs a server with two viewers which each take 'frame_time' seconds to draw a frame, longer than a tick. The
+    first reads one state per frame, the way a viewer which draws every state would; the server must skip states for
+    it so its delay stays bounded. The second draws only the newest state, the way 'watch()' does, and must stay
+    within a few ticks of the server without any state being skipped for it.
+
+    :param ticks: an int representing the amount of ticks to run the server for.
+    :param history: an int representing the amount of recent ticks the server keeps as delta bases.
+    :param frame_time: a float representing the seconds each viewer spends on one frame.
+    :return: a dict of the 'skipped' states and worst 'latency_ms' of the viewer which reads every state, and the
+    'frames' drawn and the 'ticks_behind' of the oldest state drawn by the one which draws the newest.
+    """
+
+    from server import GameServer, create_headless_window
+    from game import Game
+
+    window = create_headless_window()
+    server = GameServer(lambda: Game(window), history=history)
+    host, port = await server.start()
+    every, newest = ViewerClient(), ViewerClient()
+    await every.connect(host, port)
+    while not server.connections:
+        await asyncio.sleep(0.01)
+    await newest.connect(host, port)
+    while len(server.connections) < 2:
+        await asyncio.sleep(0.01)
+    every_connection, newest_connection = server.connections
+
+    async def read_every():
+        while True:
+            await every.receive()
+            await asyncio.sleep(frame_time)
+
+    frames = []  # How many ticks the server was ahead of each state drawn by the viewer which draws the newest
+
+    async def read_newest():
+        while True:
+            await newest.arrived.wait()
+            newest.arrived.clear()
+            frames.append(server.tick - read_view_state(newest.latest)["tick"])
+            await asyncio.sleep(frame_time)
+
+    readers = [asyncio.ensure_future(reader) for reader in (read_every(), newest.follow(), read_newest())]
+    await server.run(ticks)
+    while newest.latest is None or read_view_state(newest.latest)["tick"] < ticks:
+        await asyncio.sleep(0.01)
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    bound = 2 * history / server.tick_rate
+    every_metrics = every.get_metrics()
+    assert every_connection.states_skipped > 0, "no states were skipped for the viewer which fell behind"
+    assert every_metrics["latency_ms_max"] < bound * 1000, \
+        "the viewer which fell behind was %.0f ms late" % every_metrics["latency_ms_max"]
+    assert newest_connection.states_skipped == 0, "states were skipped for the viewer which draws the newest"
+    assert max(frames) <= 2, "the viewer which draws the newest drew a state %d ticks old" % max(frames)
+    assert newest.latest == server.history[ticks], "the viewer which draws the newest differs from the server"
+
+    await every.close()
+    await newest.close()
+    await server.close()
+    window.close()
+    return {"every": {"skipped": every_connection.states_skipped, "latency_ms": every_metrics["latency_ms_max"]},
+            "newest": {"frames": len(frames), "ticks_behind": max(frames)}}
+
+
+def print_check(metrics):
+    """Prints the metrics returned by 'loopback_check()'."""
+
+    clients = metrics["clients"]
+    print("%d clients agree with the server after %d ticks (score %d)" % (len(clients), metrics["ticks"],
+                                                                         metrics["score"]))
+    print("server: %.2f ms/tick (worst %.2f)" % (metrics["tick_ms_mean"], metrics["tick_ms_max"]))
+    print("per client: %.0f bytes/state (%d bytes uncompressed), %.0f bytes/s"
+          % (metrics["bytes_per_state"], metrics["raw_bytes_per_state"],
+             sum(client["bytes_per_second"] for client in clients) / max(len(clients), 1)))
+    print("latency: %.2f ms mean, %.2f ms worst" % (metrics["latency_ms_mean"], metrics["latency_ms_max"]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Watch or play an ASTEROIDS game streamed by 'server.py'.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--unix', metavar='PATH', help="connect over a Unix socket instead of TCP")
+    parser.add_argument('--play', action='store_true', help="control the ship with the arrow keys and space bar")
+    parser.add_argument('--resolution', metavar='WxH', help="the size of the display, e.g. 1920x1080")
+    parser.add_argument('--check', action='store_true', help="run the loopback check instead of connecting")
+    args = parser.parse_args()
+
+    if args.check:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        asyncio.run(player_check())
+        print("only the first player steers, and the ship stops when it leaves")
+        print("delayed acknowledgements: %d deltas decoded" % asyncio.run(delayed_ack_check()))
+        print("acknowledgements older than the history: %d deltas decoded" % asyncio.run(delayed_ack_check(delay=15)))
+        slow = asyncio.run(slow_client_check())
+        print("slow viewer drawing every state: %d states skipped, %.0f ms worst latency"
+              % (slow["every"]["skipped"], slow["every"]["latency_ms"]))
+        print("slow viewer drawing the newest state: %d frames drawn, at most %d ticks behind"
+              % (slow["newest"]["frames"], slow["newest"]["ticks_behind"]))
+        print_check(asyncio.run(loopback_check()))
+        if hasattr(asyncio, "start_unix_server") and sys.platform != "win32":
+            path = "/tmp/asteroids-check-%d.sock" % os.getpid()
+            try:
+                print_check(asyncio.run(loopback_check(unix_path=path)))
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+    else:
+        resolution = tuple(int(value) for value in args.resolution.lower().split('x')) if args.resolution else None
+        asyncio.run(watch(args.host, args.port, args.unix, args.play, resolution))
@@ -10,18 +10,24 @@ from pygame.locals import *
 from laser import Laser
 from asteroid import Asteroid
 from star import Star
+from assets import load_image, load_rotation_frames
 
 
 class Game:
 
-    def __init__(self, window):
+    def __init__(self, window, telemetry=None, rewind_buffer=None):
         """Initializes an instance of the Game class.
 
         :param window: the pygame support module window object
+        :param telemetry: an optional Telemetry object which will be sampled once per game tick
+        :param rewind_buffer: an optional RewindBuffer object. If given, the state of the game is stored every tick,
+        and holding 'R' rewinds the game one tick per frame.
         """
 
         # Static class attributes
         self.window = window
+        self.telemetry = telemetry
+        self.rewind_buffer = rewind_buffer
         self.surface = window.get_surface()
         self.close_clicked = False
         self.continue_game = True
@@ -35,8 +41,11 @@ class Game:
         self.game_end_clock = 0
         self.last_spawn = 0
         self.score = 0
+        self.cull_counts = {}  # The amount of objects culled during the current frame, by culling stage
+        self.reset_cull_counts()
 
-        # Adjustable class attributes
+        # Adjustable class attributes. 'VectorGame' in 'vector_env.py' copies those which affect the rules, so any
+        # change to them must be made there too, and checked by running 'vector_env.py'.
         self.header_1_size = 50
         self.header_2_size = 20
         self.left_margin = 100
@@ -52,6 +61,8 @@ class Game:
         self.asteroid_size = 50
         self.asteroid_margin_x = 200  # The lateral distance beside the window in which an asteroid may spawn
         self.asteroid_margin_y = 100  # The vertical distance above the window in which an asteroid may spawn
+        self.asteroid_rotation_frames = 36  # The amount of pre-rendered frames for one full turn of an asteroid
+        self.asteroid_max_spin = 2  # The most rotation frames an asteroid may turn by each tick
         
         self.laser_buffer = 15
         self.laser_buffer_intro = 20  # Adjust this to change the amount of lasers that fire before the game begins
@@ -66,14 +77,14 @@ class Game:
         self.pause_time = 0.02  # Smaller number is faster game
 
         # Create image/Rect objects for space ship animation
-        self.ship_img_1 = pygame.transform.scale(pygame.image.load("images/ship_1.png"), self.ship_size)
-        self.ship_img_2 = pygame.transform.scale(pygame.image.load("images/ship_2.png"), self.ship_size)
-        self.explosion_1 = pygame.transform.scale(pygame.image.load("images/explosion_1.png"), self.ship_size)
-        self.explosion_2 = pygame.transform.scale(pygame.image.load("images/explosion_2.png"), self.ship_size)
-        self.explosion_3 = pygame.transform.scale(pygame.image.load("images/explosion_3.png"), self.ship_size)
-        self.explosion_4 = pygame.transform.scale(pygame.image.load("images/explosion_4.png"), self.ship_size)
-        self.explosion_5 = pygame.transform.scale(pygame.image.load("images/explosion_5.png"), self.ship_size)
-        self.explosion_6 = pygame.transform.scale(pygame.image.load("images/explosion_6.png"), self.ship_size)
+        self.ship_img_1 = load_image("images/ship_1.png", self.ship_size)
+        self.ship_img_2 = load_image("images/ship_2.png", self.ship_size)
+        self.explosion_1 = load_image("images/explosion_1.png", self.ship_size)
+        self.explosion_2 = load_image("images/explosion_2.png", self.ship_size)
+        self.explosion_3 = load_image("images/explosion_3.png", self.ship_size)
+        self.explosion_4 = load_image("images/explosion_4.png", self.ship_size)
+        self.explosion_5 = load_image("images/explosion_5.png", self.ship_size)
+        self.explosion_6 = load_image("images/explosion_6.png", self.ship_size)
         self.ship_rect = pygame.Rect(self.window.get_width()/2, self.ship_height, self.ship_size[0], self.ship_size[1])
 
         # Set the window for Star, Laser, and Asteroid Objects
@@ -81,6 +92,10 @@ class Game:
         Laser.set_window(self.window)
         Asteroid.set_window(self.window)
 
+        # Render the asteroid rotation frames now, rather than when the first asteroid spawns
+        load_rotation_frames("images/asteroid.png", (self.asteroid_size, self.asteroid_size),
+                             self.asteroid_rotation_frames)
+
     def play(self):
         """Executes one full round of the Asteroids game. The game begins with an introductory message.
         Then game play begins. Once a player's ship has been destroyed, the game is over, and a game-
@@ -96,10 +111,19 @@ class Game:
 
         while not self.close_clicked and self.continue_game:
             self.handle_event()
+            self.reset_cull_counts()
+            if self.rewind_buffer is not None and self.pressed[K_r] and self.rewind_buffer.rewind(self):
+                self.draw()
+                time.sleep(self.pause_time)
+                continue
             self.update()
             self.draw()
             self.check_collision()
+            if self.telemetry:
+                self.telemetry.sample(self, "play")
             self.clock += 1
+            if self.rewind_buffer is not None:
+                self.rewind_buffer.push(self)
             time.sleep(self.pause_time)
 
     def handle_event(self):
@@ -222,32 +246,37 @@ class Game:
 
     def check_collision(self):
         """Checks to see if any asteroid has collided with the ship, and the game has ended. Checks to see
-        if any laser has collided with an asteroid; if so, destroys the asteroid.
+        if any laser has collided with an asteroid; if so, destroys the asteroid. Lasers are checked in the
+        order they were fired, and each laser destroys only the oldest asteroid it has collided with.
+        Asteroids which lie outside of the area covered by the ship and lasers are not checked.
         """
 
-        asteroid_index = 0
-        for asteroid in self.asteroid_list:
+        reach = self.ship_rect.unionall([laser.get_rect() for laser in self.laser_list])
+        asteroids = [asteroid for asteroid in self.asteroid_list if asteroid.check_collide(reach)]
+        self.cull_counts["collision"] = len(self.asteroid_list) - len(asteroids)
 
+        for asteroid in asteroids:
             if asteroid.check_collide(self.ship_rect):
                 self.continue_game = False
 
-            laser_index = 0
-            for laser in self.laser_list:
-                kill = asteroid.check_collide(laser.get_rect())
-                if kill:
-                    del self.laser_list[laser_index]
-                    del self.asteroid_list[asteroid_index]
+        for laser in list(self.laser_list):
+            for asteroid in asteroids:
+                if asteroid.check_collide(laser.get_rect()):
+                    self.laser_list.remove(laser)
+                    self.asteroid_list.remove(asteroid)
+                    asteroids.remove(asteroid)
                     self.score += 1
-                laser_index += 1
-
-            asteroid_index += 1
+                    break
 
     def game_intro(self):
         """Displays the intro while the player has not pressed enter, and the close box has not been clicked."""
 
         while not self.close_clicked and not self.handle_event_intro():
+            self.reset_cull_counts()
             self.draw_intro()
             self.update_intro()
+            if self.telemetry:
+                self.telemetry.sample(self, "intro")
             self.clock += 1
             time.sleep(self.pause_time)
 
@@ -257,8 +286,11 @@ class Game:
         """
 
         while not self.close_clicked and not self.handle_event_game_over():
+            self.reset_cull_counts()
             self.draw_game_over()
             self.update_game_over()
+            if self.telemetry:
+                self.telemetry.sample(self, "game over")
             self.game_end_clock += 1
             time.sleep(self.pause_time)
 
@@ -341,25 +373,25 @@ class Game:
             laser.move()
 
     def draw_lasers(self):
-        """Draws each Laser object to the surface of the window."""
+        """Draws each Laser object which is inside the window to the surface of the window."""
 
+        visible = self.surface.get_rect()
         for laser in self.laser_list:
-            laser.draw()
+            if visible.colliderect(laser.get_rect()):
+                laser.draw()
+            else:
+                self.cull_counts["draw"] += 1
 
     def remove_lasers(self):
         """Deletes Laser objects which have exited the top of the game window."""
 
-        index = 0
-        for laser in self.laser_list:
-            if laser.get_rect().centery < 0:
-                del self.laser_list[index]
-            index += 1
+        self.laser_list = [laser for laser in self.laser_list if laser.get_rect().centery >= 0]
 
     def create_asteroids(self):
         """Creates a new Asteroid object if enough time has elapsed since the creation of the last Asteroid.
-        Selects a random direction for the asteroid to move in. Decreases the amount of time between the
-        creation of each Asteroid object, so Asteroids are created more rapidly as the game progresses. Increases
-        the speed of each Asteroid that is created.
+        Selects a random direction for the asteroid to move in, and a random spin. Decreases the amount of time
+        between the creation of each Asteroid object, so Asteroids are created more rapidly as the game progresses.
+        Increases the speed of each Asteroid that is created.
         """
 
         x_pos = random.randint(-self.asteroid_margin_x, self.window.get_width() + self.asteroid_margin_x)
@@ -371,7 +403,9 @@ class Game:
                 x_mov = 0
             self.last_spawn = self.clock
             self.asteroid_buffer -= self.asteroid_buffer_decrease
-            new_asteroid = Asteroid(self.asteroid_size, [x_pos, -self.asteroid_margin_y], [x_mov, self.asteroid_speed])
+            spin = random.randint(-self.asteroid_max_spin, self.asteroid_max_spin)
+            new_asteroid = Asteroid(self.asteroid_size, [x_pos, -self.asteroid_margin_y], [x_mov, self.asteroid_speed],
+                                    spin, self.asteroid_rotation_frames)
             self.asteroid_list.append(new_asteroid)
             self.asteroid_speed += self.asteroid_speed_increase
 
@@ -382,19 +416,58 @@ class Game:
             asteroid.move()
 
     def draw_asteroids(self):
-        """Draws each Asteroid object to the game window."""
+        """Draws each Asteroid object which is inside the window to the game window."""
 
+        # A turned asteroid image reaches past the asteroid's rectangle
+        visible = self.surface.get_rect().inflate(self.asteroid_size, self.asteroid_size)
         for asteroid in self.asteroid_list:
-            asteroid.draw()
+            if asteroid.check_collide(visible):
+                asteroid.draw()
+            else:
+                self.cull_counts["draw"] += 1
 
     def remove_asteroids(self):
-        """Deletes Asteroid object which have exited the bottom of the game window."""
+        """Deletes Asteroid object which have exited the bottom of the game window, and those beside the play area
+        which will exit the bottom before they could drift into it.
+        """
 
-        index = 0
-        for asteroid in self.asteroid_list:
-            if asteroid.get_rect().centery > self.window.get_height():
-                del self.asteroid_list[index]
-            index += 1
+        height = self.window.get_height()
+        kept = [asteroid for asteroid in self.asteroid_list
+                if asteroid.get_rect().centery <= height and self.can_reach_play_area(asteroid)]
+        self.cull_counts["despawn"] += len(self.asteroid_list) - len(kept)
+        self.asteroid_list = kept
+
+    def can_reach_play_area(self, asteroid):
+        """Checks to see if an Asteroid object is in, or will drift into, the play area before exiting the bottom
+        of the game window. The play area is the window, widened on each side by the distance the ship and its
+        lasers may reach past the edge of the window.
+
+        :param asteroid: an Asteroid object
+        :return: True if the asteroid may still collide with the ship or a laser. False otherwise.
+        """
+
+        rect = asteroid.get_rect()
+        reach = self.ship_size[0] + self.ship_lateral_speed
+        left = -reach
+        right = self.window.get_width() + reach
+        x_mov = int(asteroid.velocity[0])  # Rect.move_ip() truncates toward zero
+        y_mov = int(asteroid.velocity[1])
+
+        if rect.right > left and rect.left < right:
+            return True
+        if rect.right <= left:
+            if x_mov <= 0:
+                return False
+            ticks_to_enter = -((rect.right - left - 1) // x_mov)
+        else:
+            if x_mov >= 0:
+                return False
+            ticks_to_enter = -((right - rect.left - 1) // -x_mov)
+
+        if y_mov <= 0:
+            return True
+        ticks_to_exit = (self.window.get_height() - rect.centery) // y_mov + 1
+        return ticks_to_enter < ticks_to_exit
 
     def create_stars(self):
         """Creates a new Star object in random position."""
@@ -417,16 +490,27 @@ class Game:
             star.move()
 
     def draw_stars(self):
-        """Draws each Star object to the game window."""
+        """Draws each Star object which is inside the window to the game window."""
 
+        visible = self.surface.get_rect()
+        white = Color("white")
         for star in self.star_list:
-            pygame.draw.rect(self.surface, Color("white"), star.get_rect())
+            if visible.colliderect(star.get_rect()):
+                pygame.draw.rect(self.surface, white, star.get_rect())
+            else:
+                self.cull_counts["draw"] += 1
+
+    def reset_cull_counts(self):
+        """Starts counting culled objects for a new frame; called at the start of each frame of every game loop.
+        'draw' counts objects outside of the window which were not drawn, 'collision' counts asteroids which could
+        not collide with the ship or a laser and were not checked, and 'despawn' counts asteroids deleted because
+        they can no longer reach the play area.
+        """
+
+        self.cull_counts = {"draw": 0, "collision": 0, "despawn": 0}
 
     def remove_stars(self):
         """Deletes Star objects which have exited the bottom of the game window."""
 
-        index = 0
-        for star in self.star_list:
-            if star.get_rect().centery > self.window.get_height():
-                del self.star_list[index]
-            index += 1
+        height = self.window.get_height()
+        self.star_list = [star for star in self.star_list if star.get_rect().centery <= height]
@@ -3,6 +3,7 @@
 from pygame import init, quit, Color, Surface, Rect, KEYUP, K_SPACE, K_RETURN, K_z, K_LSHIFT, K_RSHIFT, K_CAPSLOCK, \
     K_BACKSPACE
 from pygame.display import set_caption, set_mode, update
+from pygame.transform import scale, smoothscale
 from pygame.font import SysFont, Font
 from pygame.event import poll
 from pygame.key import get_pressed, name
@@ -11,23 +12,41 @@ from pygame.key import get_pressed, name
 class Window:
     """A Window represents a display window with a title bar, close box and interior drawing surface."""
 
-    def __init__(self, title, width, height):
+    def __init__(self, title, width, height, logical_size=None, smooth=True):
         """Create and open a window to draw in.
 
+        When a logical size is given, everything is drawn onto an off-screen surface of that size, which is scaled
+        once onto the display (keeping its aspect ratio) each time the window is updated. Auto update is turned off
+        in that case, since every partial update would cost a full scale.
+
         :param title: the str title of the window
         :param width: the int pixel width of the window
         :param height: the int pixel height of the window
+        :param logical_size: an optional (width, height) tuple giving the int pixel size of the drawing surface
+        :param smooth: a Boolean indicating if the logical surface should be smoothly scaled onto the display
         """
 
         init()
-        self.__surface__ = set_mode((width, height), 0, 0)
+        self.__display__ = set_mode((width, height), 0, 0)
+        self.__target__ = None
+        self.__smooth__ = smooth
+        if logical_size is not None and tuple(logical_size) != (width, height):
+            self.__surface__ = Surface(logical_size).convert()
+            factor = min(width / logical_size[0], height / logical_size[1])
+            target_size = (round(logical_size[0] * factor), round(logical_size[1] * factor))
+            target_rect = Rect(((width - target_size[0]) // 2, (height - target_size[1]) // 2), target_size)
+            self.__target__ = self.__display__.subsurface(target_rect)
+            if self.__display__.get_bitsize() not in (24, 32):
+                self.__smooth__ = False
+        else:
+            self.__surface__ = self.__display__
         set_caption(title)
         self.__font_name__ = ''
         self.__font_size__ = 18
         self.__font__ = SysFont(self.__font_name__, self.__font_size__, True)
         self.__font_color__ = 'white'
         self.__bg_color__ = 'black'
-        self.__auto_update__ = True
+        self.__auto_update__ = self.__target__ is None
 
     def close(self):
         """Close the window."""
@@ -121,7 +140,7 @@ class Window:
 
         self.__surface__.fill(Color(self.__bg_color__))
         if self.__auto_update__:
-            update()
+            self.update()
 
     def get_surface(self):
         """Return the Pygame.Surface object that represents the interior drawing surface of the window.
@@ -142,8 +161,11 @@ class Window:
         text_image = self.__font__.render(string, True, Color(self.__font_color__), Color(self.__bg_color__))
         self.__surface__.blit(text_image, (x, y))
         if self.__auto_update__:
-            text_rect = Rect((x, y), text_image.get_size())
-            update(text_rect)
+            if self.__target__ is not None:
+                self.update()
+            else:
+                text_rect = Rect((x, y), text_image.get_size())
+                update(text_rect)
 
     def input_string(self, prompt, x, y):
         """Draw a prompt string in the window using the current font and colors. Check keys pressed by the
@@ -159,7 +181,7 @@ class Window:
         while key != K_RETURN:
             self.draw_string(prompt + answer + '    ', x, y)
             if not self.__auto_update__:
-                update()
+                self.update()
             key = self._get_key()
             key_state = get_pressed()
             if (K_SPACE <= key <= K_z):
@@ -185,6 +207,11 @@ class Window:
     def update(self):
         """Update the window by copying all drawn objects from the frame buffer to the display."""
 
+        if self.__target__ is not None:
+            if self.__smooth__:
+                smoothscale(self.__surface__, self.__target__.get_size(), self.__target__)
+            else:
+                scale(self.__surface__, self.__target__.get_size(), self.__target__)
         update()
 
     def _get_key(self):
@@ -3,6 +3,7 @@ which are fired towards incoming asteroids by the user. Each Laser has a size, a
 """
 
 import pygame
+from assets import load_image
 
 
 class Laser:
@@ -28,7 +29,7 @@ class Laser:
 
         self.velocity = velocity
         self.laser_rect = pygame.Rect(location[0], location[1], size[0], size[1])
-        self.laser_img = pygame.transform.scale(pygame.image.load("images/ship_laser.png"), (size[0], size[1]))
+        self.laser_img = load_image("images/ship_laser.png", size)
 
     def move(self):
         """Moves the laser by 'self.velocity' units in the upward direction."""
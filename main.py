@@ -8,20 +8,46 @@ Last Update: 2019/08/21
 Contributors: Austin Tralnberg
 """
 
+import argparse
 from graphic_support_mod import Window
 from game import Game
+from telemetry import Telemetry
+from savestate import RewindBuffer
 
+LOGICAL_SIZE = (700, 700)  # The size the game is drawn at, regardless of the size of the display
 
-def main():
+
+def main(telemetry_path=None, display_size=LOGICAL_SIZE, rewind=False):
     """Creates Window object, creates Game object, and executes one round of the
     Asteroids game.
+
+    :param telemetry_path: an optional str path. If given, memory telemetry is recorded during the game and the
+    timeline is exported to this path once the game is over.
+    :param display_size: a (width, height) tuple of ints giving the size of the display. The game is drawn at
+    'LOGICAL_SIZE' and scaled once per frame to fit the display.
+    :param rewind: a Boolean. If True, the game may be rewound by holding 'R'.
     """
 
-    window = Window('Asteroids', 700, 700)
-    game = Game(window)
+    telemetry = None
+    if telemetry_path:
+        telemetry = Telemetry()
+        telemetry.start()
+
+    window = Window('Asteroids', display_size[0], display_size[1], LOGICAL_SIZE)
+    game = Game(window, telemetry, RewindBuffer() if rewind else None)
     game.play()
     window.close()
 
+    if telemetry:
+        telemetry.stop()
+        telemetry.export(telemetry_path)
+
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Play ASTEROIDS.")
+    parser.add_argument('--telemetry', metavar='PATH', help="record memory telemetry and export it to PATH")
+    parser.add_argument('--resolution', metavar='WxH', default='%dx%d' % LOGICAL_SIZE,
+                        help="the size of the display, e.g. 1920x1080")
+    parser.add_argument('--rewind', action='store_true', help="hold 'R' during the game to rewind it")
+    args = parser.parse_args()
+    main(args.telemetry, tuple(int(value) for value in args.resolution.lower().split('x')), args.rewind)
@@ -0,0 +1,378 @@
+"""Here are the save-state functions and the 'RewindBuffer' class for the "Asteroids" game. 'capture()' packs the full
+state of a Game object into a compact binary snapshot, and 'restore()' puts a Game object back into that state. A
+RewindBuffer keeps the snapshot of every tick in a fixed amount of memory, so the game may be rewound or resumed from
+an earlier tick.
+
+A snapshot is laid out as a header, the state of the random number generator, then the positions of every laser,
+asteroid and star, in that order (see 'HEADER' and 'capture()'). Inside a RewindBuffer, most snapshots are stored as
+the XOR of themselves and the previous snapshot, which is mostly zero bytes and compresses well.
+
+Running this file prints the cost of capturing, storing and restoring a snapshot of a busy game.
+"""
+
+import math
+import zlib
+import random
+import struct
+from array import array
+from collections import deque
+from laser import Laser
+from asteroid import Asteroid
+from star import Star
+
+# ship x, ship y, clock, last fire, last spawn, asteroid buffer, asteroid speed, score, continue game,
+# laser count, asteroid count, star count
+HEADER = struct.Struct("<hhiiiddi?HHH")
+RNG = struct.Struct("<625Id")  # The Mersenne Twister state, and the gauss value (NaN when there is none)
+FRAME = struct.Struct("<?I")  # Is a key frame, length of the snapshot
+
+
+def capture(game):
+    """Packs the state of 'game' into bytes.
+
+    :param game: the Game object to capture.
+    :return: a bytes object which may be passed to 'restore()'.
+    """
+
+    version, mt_state, gauss = random.getstate()
+    lasers = array("h", [value for laser in game.laser_list for value in laser.laser_rect.topleft])
+    asteroids = array("h", [value for asteroid in game.asteroid_list
+                            for value in (asteroid.asteroid_rect.x, asteroid.asteroid_rect.y, asteroid.velocity[0],
+                                          asteroid.frame, asteroid.spin)])
+    asteroid_speeds = array("d", [asteroid.velocity[1] for asteroid in game.asteroid_list])
+    stars = array("h", [value for star in game.star_list for value in star.star_rect.topleft])
+
+    return b"".join((
+        HEADER.pack(game.ship_rect.x, game.ship_rect.y, game.clock, game.last_fire, game.last_spawn,
+                    game.asteroid_buffer, game.asteroid_speed, game.score, game.continue_game,
+                    len(game.laser_list), len(game.asteroid_list), len(game.star_list)),
+        RNG.pack(*mt_state, math.nan if gauss is None else gauss),
+        lasers.tobytes(), asteroids.tobytes(), asteroid_speeds.tobytes(), stars.tobytes(),
+    ))
+
+
+def restore(game, data):
+    """Puts 'game' back into the state packed in 'data'. Existing Laser, Asteroid and Star objects are moved into
+    place, so new objects are only created when the snapshot holds more of them than the game does.
+
+    :param game: the Game object to restore.
+    :param data: a bytes object returned by 'capture()'.
+    """
+
+    (ship_x, ship_y, game.clock, game.last_fire, game.last_spawn, game.asteroid_buffer, game.asteroid_speed,
+     game.score, game.continue_game, laser_count, asteroid_count, star_count) = HEADER.unpack_from(data)
+    game.ship_rect.topleft = (ship_x, ship_y)
+
+    rng = RNG.unpack_from(data, HEADER.size)
+    random.setstate((3, rng[:-1], None if math.isnan(rng[-1]) else rng[-1]))
+
+    offset = HEADER.size + RNG.size
+    lasers = array("h", data[offset:offset + 4 * laser_count])
+    offset += 4 * laser_count
+    asteroids = array("h", data[offset:offset + 10 * asteroid_count])
+    offset += 10 * asteroid_count
+    asteroid_speeds = array("d", data[offset:offset + 8 * asteroid_count])
+    offset += 8 * asteroid_count
+    stars = array("h", data[offset:offset + 4 * star_count])
+
+    del game.laser_list[laser_count:]
+    for i in range(len(game.laser_list), laser_count):
+        game.laser_list.append(Laser(game.laser_size, (0, 0), game.laser_speed))
+    for i, laser in enumerate(game.laser_list):
+        laser.laser_rect.topleft = (lasers[2 * i], lasers[2 * i + 1])
+
+    del game.asteroid_list[asteroid_count:]
+    for i in range(len(game.asteroid_list), asteroid_count):
+        game.asteroid_list.append(Asteroid(game.asteroid_size, (0, 0), None, 0, game.asteroid_rotation_frames))
+    for i, asteroid in enumerate(game.asteroid_list):
+        asteroid.asteroid_rect.topleft = (asteroids[5 * i], asteroids[5 * i + 1])
+        asteroid.velocity = [asteroids[5 * i + 2], asteroid_speeds[i]]
+        asteroid.frame = asteroids[5 * i + 3] % len(asteroid.frames)
+        asteroid.spin = asteroids[5 * i + 4]
+
+    del game.star_list[star_count:]
+    for i in range(len(game.star_list), star_count):
+        game.star_list.append(Star(game.star_size, (0, 0), game.star_velocity))
+    for i, star in enumerate(game.star_list):
+        star.star_rect.topleft = (stars[2 * i], stars[2 * i + 1])
+
+
+def xor_delta(data, previous):
+    """Returns the XOR of 'data' and 'previous', with 'previous' cut or zero padded to the length of 'data'."""
+
+    length = len(data)
+    previous = previous[:length].ljust(length, b"\0")
+    return (int.from_bytes(data, "little") ^ int.from_bytes(previous, "little")).to_bytes(length, "little")
+
+
+class RewindBuffer:
+
+    def __init__(self, capacity=4 * 1024 * 1024, key_frame_interval=30):
+        """Initializes an instance of the RewindBuffer class.
+
+        :param capacity: an int representing the amount of bytes used to store snapshots. The oldest snapshots are
+        dropped to make room for new ones.
+        :param key_frame_interval: an int representing the amount of snapshots between each snapshot which is stored
+        whole. Restoring a snapshot decodes at most this many snapshots.
+        """
+
+        self.memory = bytearray(capacity)
+        self.key_frame_interval = key_frame_interval
+        self.frames = deque()  # (tick, offset, size, key frame) of each stored snapshot, oldest first
+        self.write_offset = 0
+        self.since_key_frame = 0
+        self.latest = None  # The most recent snapshot, decoded
+
+    def __len__(self):
+        """Returns the amount of snapshots stored."""
+
+        return len(self.frames)
+
+    def get_ticks(self):
+        """Returns the game clock of the oldest and newest stored snapshots.
+
+        :return: a tuple of two ints, or None if nothing is stored.
+        """
+
+        if not self.frames:
+            return None
+        return self.frames[0][0], self.frames[-1][0]
+
+    def push(self, game):
+        """Captures the state of 'game' and stores it as the newest snapshot.
+
+        :param game: the Game object to capture.
+        """
+
+        self.push_snapshot(game.clock, capture(game))
+
+    def push_snapshot(self, tick, data):
+        """Stores 'data', a snapshot returned by 'capture()', as the newest snapshot.
+
+        :param tick: an int representing the game clock of the snapshot.
+        :param data: a bytes object returned by 'capture()'.
+        """
+
+        key_frame = self.latest is None or self.since_key_frame >= self.key_frame_interval
+        payload = zlib.compress(data if key_frame else xor_delta(data, self.latest), 1)
+        size = FRAME.size + len(payload)
+        self.check_fits(size)
+
+        if self.write_offset + size > len(self.memory):
+            self.drop_overwritten(self.write_offset, len(self.memory))
+            self.write_offset = 0
+        self.drop_overwritten(self.write_offset, self.write_offset + size)
+        if not self.frames and not key_frame:
+            # Nothing is left to decode a delta against, so the snapshot is stored whole in the emptied memory
+            key_frame = True
+            payload = zlib.compress(data, 1)
+            size = FRAME.size + len(payload)
+            self.write_offset = 0
+            self.check_fits(size)
+
+        FRAME.pack_into(self.memory, self.write_offset, key_frame, len(data))
+        self.memory[self.write_offset + FRAME.size:self.write_offset + size] = payload
+        self.frames.append((tick, self.write_offset, size, key_frame))
+        self.write_offset += size
+        self.since_key_frame = 0 if key_frame else self.since_key_frame + 1
+        self.latest = data
+
+    def check_fits(self, size):
+        """Raises a ValueError if a stored snapshot of 'size' bytes would not fit in the memory of the buffer.
+
+        :param size: an int representing the amount of bytes to store.
+        """
+
+        if size > len(self.memory):
+            raise ValueError("a snapshot of %d bytes does not fit in a rewind buffer of %d bytes"
+                             % (size, len(self.memory)))
+
+    def drop_overwritten(self, start, end):
+        """Drops the oldest snapshots while they lie in the bytes from 'start' to 'end', then drops any snapshots
+        which can no longer be decoded because the key frame before them has been dropped.
+        """
+
+        while self.frames and self.frames[0][1] < end and start < self.frames[0][1] + self.frames[0][2]:
+            self.frames.popleft()
+        while self.frames and not self.frames[0][3]:
+            self.frames.popleft()
+
+    def decode(self, index):
+        """Returns the snapshot stored at 'index', counting from the oldest.
+
+        :param index: an int index into 'self.frames'.
+        :return: a bytes object returned by 'capture()'.
+        """
+
+        if index == len(self.frames) - 1 and self.latest is not None:
+            return self.latest
+        key = index
+        while not self.frames[key][3]:
+            key -= 1
+        data = b""
+        for i in range(key, index + 1):
+            tick, offset, size, key_frame = self.frames[i]
+            length = FRAME.unpack_from(self.memory, offset)[1]
+            payload = zlib.decompress(self.memory[offset + FRAME.size:offset + size])
+            data = payload if key_frame else xor_delta(payload, data)
+            assert len(data) == length
+        return data
+
+    def restore_tick(self, game, tick):
+        """Puts 'game' back into the state of the newest snapshot taken at or before 'tick'. Newer snapshots are
+        dropped, so play continues from that tick.
+
+        :param game: the Game object to restore.
+        :param tick: an int game clock.
+        :return: True if a snapshot was restored, False if none is old enough.
+        """
+
+        if not self.frames or self.frames[0][0] > tick:
+            return False
+        index = len(self.frames) - 1
+        while self.frames[index][0] > tick:
+            index -= 1
+        data = self.decode(index)
+        while len(self.frames) > index + 1:
+            self.frames.pop()
+        self.truncate(data)
+        restore(game, data)
+        return True
+
+    def rewind(self, game):
+        """Puts 'game' back into the state of the snapshot before the newest, dropping the newest.
+
+        :param game: the Game object to restore.
+        :return: True if the game was rewound, False if there is nothing older to rewind to.
+        """
+
+        if len(self.frames) < 2:
+            return False
+        return self.restore_tick(game, self.frames[-2][0])
+
+    def truncate(self, data):
+        """Makes the newest stored snapshot, whose decoded bytes are 'data', the base for the next snapshot."""
+
+        tick, offset, size, key_frame = self.frames[-1]
+        self.write_offset = offset + size
+        self.latest = data
+        self.since_key_frame = 0
+        for frame in reversed(self.frames):
+            if frame[3]:
+                break
+            self.since_key_frame += 1
+
+
+def benchmark(ticks=2000, seed=0):
+    """Plays a game with random actions, capturing, storing and restoring a snapshot every tick.
+
+    :return: a dict of the average cost of each operation in microseconds, and the average stored snapshot size.
+    """
+
+    import os
+    import time
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from graphic_support_mod import Window
+    from game import Game
+
+    random.seed(seed)
+    window = Window('Asteroids save-state benchmark', 700, 700)
+    game = Game(window)
+    game.fill_screen_w_stars()
+    buffer = RewindBuffer()
+    costs = {"capture": 0.0, "push": 0.0, "restore": 0.0, "decode": 0.0}
+    stored = 0
+
+    for tick in range(ticks):
+        game.pressed = {pygame.K_LEFT: random.random() < 0.3, pygame.K_RIGHT: random.random() < 0.3,
+                        pygame.K_SPACE: True}
+        game.update()
+        game.check_collision()
+        game.continue_game = True
+        game.clock += 1
+
+        start = time.perf_counter()
+        data = capture(game)
+        costs["capture"] += time.perf_counter() - start
+        start = time.perf_counter()
+        buffer.push_snapshot(game.clock, data)
+        costs["push"] += time.perf_counter() - start
+        stored += buffer.frames[-1][2]
+        start = time.perf_counter()
+        restore(game, data)
+        costs["restore"] += time.perf_counter() - start
+        start = time.perf_counter()
+        if len(buffer) > 1:
+            buffer.decode(len(buffer) - 2)
+        costs["decode"] += time.perf_counter() - start
+
+    window.close()
+    result = {name: cost / ticks * 1e6 for name, cost in costs.items()}
+    result["raw bytes"] = len(data)
+    result["stored bytes"] = stored / ticks
+    result["snapshots kept"] = len(buffer)
+    return result
+
+
+def rewind_check(ticks=50, rewinds=10):
+    """Drives 'Game.game_play()' with a RewindBuffer attached, holding the space bar for 'ticks' ticks and then 'R' for
+    'rewinds' frames. Checks that a snapshot was stored every tick and that each frame of 'R' rewound one tick. Also
+    checks that a snapshot which cannot fit is refused without growing the memory of the buffer.
+
+    :return: the amount of snapshots stored once the check is over.
+    """
+
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from graphic_support_mod import Window
+    from game import Game
+
+    class ScriptedGame(Game):
+        """A Game whose keys are pressed by a script rather than the keyboard."""
+
+        def __init__(self, window, rewind_buffer, script):
+            super().__init__(window, rewind_buffer=rewind_buffer)
+            self.script = script
+            self.pause_time = 0
+
+        def handle_event(self):
+            key = self.script.pop(0)
+            self.close_clicked = not self.script  # The loop finishes the current tick, then stops
+            self.pressed = {pygame.K_LEFT: False, pygame.K_RIGHT: False, pygame.K_SPACE: key == pygame.K_SPACE,
+                            pygame.K_r: key == pygame.K_r}
+
+    random.seed(0)
+    window = Window('Asteroids rewind check', 700, 700)
+    buffer = RewindBuffer()
+    game = ScriptedGame(window, buffer, [pygame.K_SPACE] * ticks)
+    game.game_play()
+    assert len(buffer) == ticks, "%d snapshots stored over %d ticks" % (len(buffer), ticks)
+    assert game.clock == ticks
+
+    game.close_clicked = False
+    game.script = [pygame.K_r] * rewinds
+    game.game_play()
+    assert game.clock == ticks - rewinds, "rewound to tick %d rather than %d" % (game.clock, ticks - rewinds)
+    assert len(buffer) == ticks - rewinds
+    window.close()
+
+    small = RewindBuffer(capacity=6000)
+    noise = random.Random(0)
+    small.push_snapshot(0, bytes(noise.getrandbits(8) for i in range(4000)))
+    try:
+        small.push_snapshot(1, small.latest + bytes(noise.getrandbits(8) for i in range(4000)))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a key frame larger than the buffer was stored")
+    assert len(small.memory) == 6000, "the buffer memory grew to %d bytes" % len(small.memory)
+
+    return len(buffer)
+
+
+if __name__ == '__main__':
+    print("rewind check: %d snapshots left after rewinding" % rewind_check())
+    for name, value in benchmark().items():
+        print("%-15s %10.1f" % (name, value))
@@ -0,0 +1,380 @@
+"""Here is the 'GameServer' class for the "Asteroids" game. A GameServer runs one Game without drawing it, and streams
+the state of every tick to any amount of viewers over TCP or Unix sockets, so spectators and remote displays can
+watch a live session without running their own Game. One connection may join as the player and send the keys it has
+pressed; every other connection only watches, including any which asks to play while another connection is already
+the player. 'client.py' contains a thin client which draws the stream.
+
+Every message starts with a one byte type. When a connection opens, the client sends HELLO with its role, and the
+server answers with CONFIG, which holds the sizes needed to draw the game and the amount of ticks kept as delta
+bases. The server then sends one STATE message per tick. Each STATE holds a view of the game (see 'view_state()'),
+either whole or as the XOR against the last tick the client acknowledged, compressed with zlib. Clients send ACK for
+every STATE they decode, and the player sends INPUT whenever its keys change.
+
+Running this file starts a headless server. Run 'client.py' to watch it.
+"""
+
+import os
+import sys
+import time
+import zlib
+import struct
+import asyncio
+import argparse
+import signal
+from array import array
+from collections import OrderedDict
+import pygame
+from savestate import xor_delta
+
+HELLO = 1
+CONFIG = 2
+STATE = 3
+ACK = 4
+INPUT = 5
+
+VIEWER = 0
+PLAYER = 1
+
+LEFT = 1
+RIGHT = 2
+FIRE = 4
+
+NO_BASE = 0xFFFFFFFF  # The base tick of a STATE which is not a delta
+
+HELLO_MESSAGE = struct.Struct("<BB")  # HELLO, role
+# CONFIG, width, height, ship width, ship height, laser width, laser height, asteroid size, rotation frames, star size,
+# the amount of recent ticks the server keeps as delta bases
+CONFIG_MESSAGE = struct.Struct("<B10H")
+# STATE, tick, base tick, time sent, length of the payload
+STATE_MESSAGE = struct.Struct("<BIIdI")
+ACK_MESSAGE = struct.Struct("<BI")  # ACK, tick
+INPUT_MESSAGE = struct.Struct("<BB")  # INPUT, LEFT/RIGHT/FIRE flags
+
+# tick, score, ship x, ship y, continue game, laser count, asteroid count, star count
+VIEW_HEADER = struct.Struct("<iihh?HHH")
+
+
+def view_state(tick, game):
+    """Packs what a viewer needs to draw 'game' into bytes: the view header, then the position of every laser, the
+    position and rotation frame of every asteroid, and the position of every star.
+
+    :param tick: an int representing the server tick of the view.
+    :param game: the Game object to pack.
+    :return: a bytes object which may be passed to 'read_view_state()'.
+    """
+
+    lasers = array("h", [value for laser in game.laser_list for value in laser.laser_rect.topleft])
+    asteroids = array("h", [value for asteroid in game.asteroid_list
+                            for value in (asteroid.asteroid_rect.x, asteroid.asteroid_rect.y, asteroid.frame)])
+    stars = array("h", [value for star in game.star_list for value in star.star_rect.topleft])
+    return b"".join((
+        VIEW_HEADER.pack(tick, game.score, game.ship_rect.x, game.ship_rect.y, game.continue_game,
+                         len(game.laser_list), len(game.asteroid_list), len(game.star_list)),
+        lasers.tobytes(), asteroids.tobytes(), stars.tobytes(),
+    ))
+
+
+def read_view_state(data):
+    """Unpacks bytes returned by 'view_state()'.
+
+    :param data: a bytes object.
+    :return: a dict with the 'tick', 'score', 'ship' position and 'continue_game' flag, and arrays of 'lasers'
+    (x, y pairs), 'asteroids' (x, y, frame triples) and 'stars' (x, y pairs).
+    """
+
+    tick, score, ship_x, ship_y, continue_game, laser_count, asteroid_count, star_count = \
+        VIEW_HEADER.unpack_from(data)
+    offset = VIEW_HEADER.size
+    lasers = array("h", data[offset:offset + 4 * laser_count])
+    offset += 4 * laser_count
+    asteroids = array("h", data[offset:offset + 6 * asteroid_count])
+    offset += 6 * asteroid_count
+    stars = array("h", data[offset:offset + 4 * star_count])
+    return {"tick": tick, "score": score, "ship": (ship_x, ship_y), "continue_game": continue_game,
+            "lasers": lasers, "asteroids": asteroids, "stars": stars}
+
+
+class Connection:
+
+    def __init__(self, reader, writer, role, tick):
+        """Initializes an instance of the Connection class, which holds what the server knows about one client.
+
+        :param reader: the asyncio.StreamReader of the connection.
+        :param writer: the asyncio.StreamWriter of the connection.
+        :param role: VIEWER or PLAYER.
+        :param tick: an int representing the server tick at which the client connected.
+        """
+
+        self.reader = reader
+        self.writer = writer
+        self.role = role
+        self.joined = tick
+        self.acked = None  # The newest tick the client has acknowledged
+        self.bytes_sent = 0
+        self.states_sent = 0
+        self.states_skipped = 0  # States not sent because the client had not read the earlier ones yet
+        self.connected_at = time.perf_counter()
+
+    def lag(self, tick):
+        """Returns how many ticks the client is behind 'tick', going by the newest tick it has acknowledged.
+
+        :param tick: an int representing the newest server tick.
+        :return: an int.
+        """
+
+        return tick - (self.joined if self.acked is None else self.acked)
+
+
+class GameServer:
+
+    def __init__(self, game_factory, tick_rate=50, history=64, write_buffer_limit=256 * 1024):
+        """Initializes an instance of the GameServer class.
+
+        :param game_factory: a callable returning a new Game object. It is called again whenever a game ends.
+        :param tick_rate: an int representing the amount of ticks simulated per second.
+        :param history: an int representing the amount of recent ticks kept as bases for delta compression.
+        :param write_buffer_limit: an int representing the amount of unsent bytes a client may have before states are
+        skipped for it. States are also skipped for a client which has not acknowledged any of the last 'history'
+        ticks, since the buffers of the operating system can hold far more than this before the limit is reached.
+        """
+
+        self.game_factory = game_factory
+        self.game = game_factory()
+        self.tick_rate = tick_rate
+        self.history = OrderedDict()  # Maps each recent tick to its view state
+        self.history_size = history
+        self.write_buffer_limit = write_buffer_limit
+        self.connections = []
+        self.handlers = set()  # The tasks reading from each open connection
+        self.servers = []
+        self.tick = 0
+        self.player = None  # The Connection of the player, if one has joined
+        self.keys = 0  # The LEFT/RIGHT/FIRE flags last sent by the player
+        self.tick_times = []  # The seconds spent simulating, packing and sending each tick
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Begins accepting TCP connections.
+
+        :param host: a str representing the address to listen on.
+        :param port: an int representing the port to listen on. 0 picks a free port.
+        :return: the (host, port) tuple being listened on.
+        """
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path):
+        """Begins accepting Unix socket connections.
+
+        :param path: a str representing the path of the socket.
+        """
+
+        server = await asyncio.start_unix_server(self.handle_connection, path)
+        self.servers.append(server)
+
+    async def close(self):
+        """Stops accepting connections, and closes every open connection."""
+
+        for server in self.servers:
+            server.close()
+        for connection in list(self.connections):
+            connection.writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+
+    async def handle_connection(self, reader, writer):
+        """Reads the messages of one client until it disconnects.
+
+        :param reader: the asyncio.StreamReader of the connection.
+        :param writer: the asyncio.StreamWriter of the connection.
+        """
+
+        connection = None
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        try:
+            message_type, role = HELLO_MESSAGE.unpack(await reader.readexactly(HELLO_MESSAGE.size))
+            if message_type != HELLO:
+                return
+            game = self.game
+            writer.write(CONFIG_MESSAGE.pack(CONFIG, game.window.get_width(), game.window.get_height(),
+                                             game.ship_size[0], game.ship_size[1], game.laser_size[0],
+                                             game.laser_size[1], game.asteroid_size, game.asteroid_rotation_frames,
+                                             game.star_size, self.history_size))
+            if role == PLAYER and self.player is not None:
+                role = VIEWER
+            connection = Connection(reader, writer, role, self.tick)
+            self.connections.append(connection)
+            if role == PLAYER:
+                self.player = connection
+
+            while True:
+                message_type = (await reader.readexactly(1))[0]
+                if message_type == ACK:
+                    tick = int.from_bytes(await reader.readexactly(ACK_MESSAGE.size - 1), "little")
+                    if connection.acked is None or tick > connection.acked:
+                        connection.acked = tick
+                elif message_type == INPUT:
+                    keys = (await reader.readexactly(INPUT_MESSAGE.size - 1))[0]
+                    if connection.role == PLAYER:
+                        self.keys = keys
+                else:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if connection in self.connections:
+                self.connections.remove(connection)
+            if connection is not None and connection is self.player:
+                # Otherwise the ship would keep doing whatever the player last asked for
+                self.player = None
+                self.keys = 0
+            self.handlers.discard(handler)
+            writer.close()
+
+    async def run(self, ticks=None):
+        """Simulates the game at 'self.tick_rate' ticks per second and streams every tick to every client.
+
+        :param ticks: an optional int representing the amount of ticks to run for. Runs forever if omitted.
+        """
+
+        period = 1 / self.tick_rate
+        next_tick = time.perf_counter()
+        while ticks is None or self.tick < ticks:
+            start = time.perf_counter()
+            self.step()
+            self.broadcast()
+            self.tick_times.append(time.perf_counter() - start)
+            next_tick += period
+            await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    def step(self):
+        """Advances the game by one tick, the way 'Game.game_play()' does, using the keys held by the player. Starts a
+        new game once the ship has been destroyed.
+        """
+
+        if not self.game.continue_game:
+            self.game = self.game_factory()
+        game = self.game
+        game.reset_cull_counts()
+        if not game.star_list:
+            game.fill_screen_w_stars()
+        game.pressed = {pygame.K_LEFT: bool(self.keys & LEFT), pygame.K_RIGHT: bool(self.keys & RIGHT),
+                        pygame.K_SPACE: bool(self.keys & FIRE)}
+        game.update()
+        game.check_collision()
+        game.clock += 1
+        self.tick += 1
+
+        self.history[self.tick] = view_state(self.tick, game)
+        while len(self.history) > self.history_size:
+            self.history.popitem(last=False)
+
+    def broadcast(self):
+        """Sends the newest tick to every client, as a delta against the newest tick the client has acknowledged
+        if that tick is still in the history. Payloads are shared between clients with the same base. Clients which
+        have fallen further behind than the history, or which have too many unsent bytes, are skipped until they
+        catch up.
+        """
+
+        data = self.history[self.tick]
+        payloads = {}
+        sent_at = time.time()
+        for connection in self.connections:
+            if (connection.lag(self.tick) > self.history_size
+                    or connection.writer.transport.get_write_buffer_size() > self.write_buffer_limit):
+                connection.states_skipped += 1
+                continue
+            base = connection.acked if connection.acked in self.history else NO_BASE
+            payload = payloads.get(base)
+            if payload is None:
+                payload = zlib.compress(data if base == NO_BASE else xor_delta(data, self.history[base]), 1)
+                payloads[base] = payload
+            header = STATE_MESSAGE.pack(STATE, self.tick, base, sent_at, len(payload))
+            connection.writer.write(header)
+            connection.writer.write(payload)
+            connection.bytes_sent += len(header) + len(payload)
+            connection.states_sent += 1
+
+    def get_metrics(self):
+        """Returns the bandwidth used by each client, and the time spent on each tick.
+
+        :return: a dict with a 'clients' list of per-client dicts, and the mean and worst 'tick_ms'.
+        """
+
+        now = time.perf_counter()
+        clients = []
+        for connection in self.connections:
+            seconds = max(now - connection.connected_at, 1e-9)
+            clients.append({"role": "player" if connection.role == PLAYER else "viewer",
+                            "bytes_sent": connection.bytes_sent, "states_sent": connection.states_sent,
+                            "states_skipped": connection.states_skipped,
+                            "bytes_per_second": connection.bytes_sent / seconds,
+                            "bytes_per_state": connection.bytes_sent / max(connection.states_sent, 1)})
+        tick_times = self.tick_times or [0.0]
+        return {"clients": clients, "ticks": self.tick,
+                "tick_ms_mean": sum(tick_times) / len(tick_times) * 1000, "tick_ms_max": max(tick_times) * 1000}
+
+
+def create_headless_window():
+    """Creates a hidden window of the size used by 'main.py', for Game objects which are never drawn.
+
+    :return: the pygame support module window object
+    """
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # Nothing polls pygame events without a display, so SIGINT and SIGTERM must be left to Python, not caught by SDL
+    os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+    from graphic_support_mod import Window
+    from main import LOGICAL_SIZE
+
+    return Window('Asteroids server', LOGICAL_SIZE[0], LOGICAL_SIZE[1])
+
+
+async def serve(host, port, unix_path, report_interval):
+    """Runs a GameServer until interrupted or sent SIGTERM, printing its metrics every 'report_interval' seconds."""
+
+    from game import Game
+
+    window = create_headless_window()
+    server = GameServer(lambda: Game(window))
+    if unix_path:
+        await server.start_unix(unix_path)
+        print("serving on %s" % unix_path)
+    else:
+        print("serving on %s:%d" % await server.start(host, port))
+
+    async def report():
+        while True:
+            await asyncio.sleep(report_interval)
+            metrics = server.get_metrics()
+            print("tick %d, %d clients, %.2f ms/tick (worst %.2f)" % (metrics["ticks"], len(metrics["clients"]),
+                                                                     metrics["tick_ms_mean"], metrics["tick_ms_max"]),
+                  file=sys.stderr)
+
+    reporter = asyncio.ensure_future(report())
+    runner = asyncio.ensure_future(server.run())
+    if sys.platform != "win32":
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, runner.cancel)
+    try:
+        await runner
+    except asyncio.CancelledError:
+        pass
+    finally:
+        reporter.cancel()
+        await server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a headless ASTEROIDS server which streams the game to viewers.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--report', type=float, default=5.0, metavar='SECONDS', help="how often to print metrics")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.report))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,185 @@
+"""Here is the 'Telemetry' class for the "Asteroids" game. This class can be used to watch where memory goes while
+the game is running. Periodic tracemalloc snapshots are taken and tagged with the phase of the game in which they were
+taken (intro, play or game over). Along with each snapshot, the amount of live game objects and the bytes they hold
+are recorded by type (Surface, Rect, Star, Laser and Asteroid), with the amount of objects culled during every frame
+since the previous snapshot. If memory keeps growing for several samples in a row
+past a threshold, an alert is raised. The recorded timeline may be exported as JSON for offline comparison.
+"""
+
+import sys
+import json
+import tracemalloc
+import pygame
+
+
+class Telemetry:
+
+    def __init__(self, interval=50, growth_threshold=512 * 1024, growth_samples=5, top_sites=5):
+        """Initializes an instance of the Telemetry class.
+
+        :param interval: an int representing the amount of game ticks between each snapshot.
+        :param growth_threshold: an int representing the amount of bytes memory may grow over 'growth_samples'
+        consecutive samples before an alert is raised.
+        :param growth_samples: an int representing the amount of consecutive growing samples needed for an alert.
+        :param top_sites: an int representing the amount of allocation sites recorded with each snapshot.
+        """
+
+        self.interval = interval
+        self.growth_threshold = growth_threshold
+        self.growth_samples = growth_samples
+        self.top_sites = top_sites
+        self.ticks = 0
+        self.timeline = []  # A list to contain one record per snapshot
+        self.alerts = []   # A list to contain one record per growth alert
+        self.last_snapshot = {}  # The most recent snapshot taken in each phase
+        self.growth_streak = []  # The traced memory of each sample in the current run of growth
+        self.culled = {}  # The amount of objects culled since the last snapshot, by culling stage
+        self.culled_total = {}  # The amount of objects culled since tracing began, by culling stage
+        self.culled_frames = 0  # The amount of frames counted in 'self.culled'
+        self.started_tracing = False
+
+    def start(self):
+        """Begins tracing memory allocations, unless tracing has already been started elsewhere."""
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def stop(self):
+        """Stops tracing memory allocations if tracing was started by this object."""
+
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def sample(self, game, phase):
+        """Counts one game tick, and the objects culled during it. Takes a snapshot of the game if 'self.interval'
+        ticks have passed since the last.
+
+        :param game: the Game object being watched.
+        :param phase: a str naming the current phase of the game, i.e. 'intro', 'play' or 'game over'.
+        """
+
+        for stage, count in game.cull_counts.items():
+            self.culled[stage] = self.culled.get(stage, 0) + count
+            self.culled_total[stage] = self.culled_total.get(stage, 0) + count
+        self.culled_frames += 1
+        if self.ticks % self.interval == 0:
+            self.take_snapshot(game, phase)
+        self.ticks += 1
+
+    def take_snapshot(self, game, phase):
+        """Records the traced memory, the live game objects, the objects culled during the frames counted since the
+        previous snapshot, and the allocation sites which have grown the most since the previous snapshot of the same
+        phase.
+
+        :param game: the Game object being watched.
+        :param phase: a str naming the current phase of the game.
+        """
+
+        if not tracemalloc.is_tracing():
+            return
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        sites = []
+        previous = self.last_snapshot.get(phase)
+        if previous is not None:
+            for stat in snapshot.compare_to(previous, "lineno")[:self.top_sites]:
+                frame = stat.traceback[0]
+                sites.append({"site": "%s:%d" % (frame.filename, frame.lineno),
+                              "size_diff": stat.size_diff, "count_diff": stat.count_diff})
+        self.last_snapshot[phase] = snapshot
+
+        record = {
+            "tick": self.ticks,
+            "clock": game.clock,
+            "phase": phase,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "entities": self.count_entities(game),
+            "culled": self.culled,
+            "culled_frames": self.culled_frames,
+            "sites": sites,
+        }
+        self.culled = {}
+        self.culled_frames = 0
+        self.timeline.append(record)
+        self.check_growth(record)
+
+    def count_entities(self, game):
+        """Counts the live game objects held by 'game', and the bytes which they hold, by type.
+
+        :param game: the Game object being watched.
+        :return: a dict mapping each type name to a dict with a 'count' and 'bytes' entry.
+        """
+
+        counts = {name: {"count": 0, "bytes": 0} for name in ("Surface", "Rect", "Star", "Laser", "Asteroid")}
+
+        def add(name, size):
+            counts[name]["count"] += 1
+            counts[name]["bytes"] += size
+
+        seen_surfaces = set()  # Images are shared between objects, so each Surface is only counted once
+
+        def add_surface(surface):
+            if id(surface) not in seen_surfaces:
+                seen_surfaces.add(id(surface))
+                size = surface.get_bytesize() * surface.get_width() * surface.get_height()
+                add("Surface", sys.getsizeof(surface) + size)
+
+        for value in vars(game).values():
+            if isinstance(value, pygame.Surface):
+                add_surface(value)
+            elif isinstance(value, pygame.Rect):
+                add("Rect", sys.getsizeof(value))
+
+        for star in game.star_list:
+            add("Star", sys.getsizeof(star) + sys.getsizeof(vars(star)))
+            add("Rect", sys.getsizeof(star.get_rect()))
+        for laser in game.laser_list:
+            add("Laser", sys.getsizeof(laser) + sys.getsizeof(vars(laser)))
+            add("Rect", sys.getsizeof(laser.get_rect()))
+            add_surface(laser.laser_img)
+        for asteroid in game.asteroid_list:
+            add("Asteroid", sys.getsizeof(asteroid) + sys.getsizeof(vars(asteroid)))
+            add("Rect", sys.getsizeof(asteroid.get_rect()))
+            for image, offset in asteroid.frames:
+                add_surface(image)
+
+        return counts
+
+    def check_growth(self, record):
+        """Raises an alert if traced memory has grown in each of the last 'self.growth_samples' samples and the
+        total growth over those samples is past 'self.growth_threshold'.
+
+        :param record: the most recent timeline record.
+        """
+
+        if self.growth_streak and record["traced_bytes"] <= self.growth_streak[-1]:
+            self.growth_streak = []
+        self.growth_streak.append(record["traced_bytes"])
+
+        if len(self.growth_streak) > self.growth_samples:
+            growth = self.growth_streak[-1] - self.growth_streak[-1 - self.growth_samples]
+            if growth > self.growth_threshold:
+                alert = {"tick": record["tick"], "phase": record["phase"], "growth_bytes": growth,
+                         "entities": {name: value["count"] for name, value in record["entities"].items()}}
+                self.alerts.append(alert)
+                print("Telemetry: memory grew by %d bytes over %d samples during '%s' (tick %d)"
+                      % (growth, self.growth_samples, record["phase"], record["tick"]), file=sys.stderr)
+                self.growth_streak = [record["traced_bytes"]]
+
+    def export(self, path):
+        """Writes the recorded timeline and alerts to 'path' as JSON.
+
+        :param path: a str representing the path of the file to write.
+        """
+
+        with open(path, "w") as file:
+            json.dump({"interval": self.interval, "timeline": self.timeline, "alerts": self.alerts,
+                       "culled_total": self.culled_total}, file, indent=2)
@@ -0,0 +1,383 @@
+"""Here is the 'VectorGame' class for the "Asteroids" game. This class steps many independent games in lockstep,
+for evaluating bots and training agents. Nothing is drawn and no pygame objects are created: the ship, lasers and
+asteroids of every game are held in NumPy arrays, and spawning, movement, culling and collision are applied to all
+games at once. The rules are the same as those of the 'Game' class (see 'cross_check()').
+
+Actions are ints made by adding together the LEFT, RIGHT and FIRE flags, as if those keys were held for one tick.
+Running this file checks the rules against the 'Game' class, then reports how many game ticks are stepped per second.
+"""
+
+import time
+import numpy as np
+
+LEFT = 1
+RIGHT = 2
+FIRE = 4
+
+
+class VectorGame:
+
+    def __init__(self, num_games, width=700, height=700, nearby_asteroids=8, seed=None):
+        """Initializes an instance of the VectorGame class.
+
+        :param num_games: an int representing the amount of games to step in lockstep.
+        :param width: an int representing the pixel width of the play area, as given by the window to 'Game'.
+        :param height: an int representing the pixel height of the play area.
+        :param nearby_asteroids: an int representing the amount of asteroids nearest the ship which are observed.
+        :param seed: an optional int used to seed the random number generator.
+        """
+
+        self.num_games = num_games
+        self.width = width
+        self.height = height
+        self.nearby_asteroids = nearby_asteroids
+        self.rng = np.random.default_rng(seed)
+
+        # Adjustable attributes, copied from the 'Game' class. They must be kept in sync by hand: a change to either
+        # class which is not made to the other only shows up when 'cross_check()' is run again.
+        self.ship_size = (50, 50)
+        self.ship_lateral_speed = 8
+        self.ship_height = 615
+
+        self.asteroid_buffer_start = 20
+        self.asteroid_buffer_decrease = 0.05
+        self.asteroid_speed_start = 2
+        self.asteroid_speed_increase = 0.05
+        self.asteroid_size = 50
+        self.asteroid_margin_x = 200
+        self.asteroid_margin_y = 100
+
+        self.laser_buffer = 15
+        self.laser_size = (30, 50)
+        self.laser_offset = 15
+        self.laser_speed = 20
+
+        # Per game state
+        n = num_games
+        self.ship_x = np.zeros(n, np.int64)
+        self.clock = np.zeros(n, np.int64)
+        self.last_fire = np.zeros(n, np.int64)
+        self.last_spawn = np.zeros(n, np.int64)
+        self.asteroid_buffer = np.zeros(n, np.float64)
+        self.asteroid_speed = np.zeros(n, np.float64)
+        self.score = np.zeros(n, np.int64)
+        self.done = np.zeros(n, bool)
+
+        # Per entity state. Live entities are kept at the front of each row, in the order they were created.
+        self.asteroid_x = np.zeros((n, 32), np.int64)
+        self.asteroid_y = np.zeros((n, 32), np.int64)
+        self.asteroid_vx = np.zeros((n, 32), np.int64)
+        self.asteroid_vy = np.zeros((n, 32), np.int64)
+        self.asteroid_alive = np.zeros((n, 32), bool)
+        self.laser_x = np.zeros((n, 4), np.int64)
+        self.laser_y = np.zeros((n, 4), np.int64)
+        self.laser_alive = np.zeros((n, 4), bool)
+
+        # The random values drawn during the last step, kept so the step can be replayed by 'cross_check()'
+        self.last_draws = None
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Starts new games.
+
+        :param mask: an optional bool array selecting which games to restart. All games are restarted if omitted.
+        :return: the observation dict of all games (see 'observe()').
+        """
+
+        if mask is None:
+            mask = np.ones(self.num_games, bool)
+        self.ship_x[mask] = self.width // 2
+        self.clock[mask] = 0
+        self.last_fire[mask] = 0
+        self.last_spawn[mask] = 0
+        self.asteroid_buffer[mask] = self.asteroid_buffer_start
+        self.asteroid_speed[mask] = self.asteroid_speed_start
+        self.score[mask] = 0
+        self.done[mask] = False
+        self.asteroid_alive[mask] = False
+        self.laser_alive[mask] = False
+        return self.observe()
+
+    def step(self, actions):
+        """Advances every game by one tick, the way 'Game.game_play()' does. Games which ended on the previous step
+        are restarted first.
+
+        :param actions: an int array of shape (num_games,) holding one action per game.
+        :return: a tuple (observation, reward, done, info). 'reward' is the amount of asteroids destroyed during
+        this tick, 'done' is True where the ship was destroyed, and 'info' holds the score of each game.
+        """
+
+        actions = np.asarray(actions)
+        if self.done.any():
+            self.reset(self.done.copy())
+        score_before = self.score.copy()
+
+        self.create_asteroids()
+        self.asteroid_x += self.asteroid_vx
+        self.asteroid_y += self.asteroid_vy
+        self.remove_asteroids()
+
+        self.create_lasers((actions & FIRE) != 0)
+        self.laser_y -= self.laser_speed
+        self.laser_alive &= self.laser_y + self.laser_size[1] // 2 >= 0
+
+        self.move_ships(actions)
+        self.check_collision()
+        self.clock += 1
+
+        self.asteroid_x, self.asteroid_y, self.asteroid_vx, self.asteroid_vy, self.asteroid_alive = _compact(
+            self.asteroid_alive, self.asteroid_x, self.asteroid_y, self.asteroid_vx, self.asteroid_vy)
+        self.laser_x, self.laser_y, self.laser_alive = _compact(self.laser_alive, self.laser_x, self.laser_y)
+
+        info = {"score": self.score.copy()}
+        return self.observe(), self.score - score_before, self.done.copy(), info
+
+    def create_asteroids(self):
+        """Creates a new asteroid in every game where enough time has elapsed since the last, with the same
+        random choices as 'Game.create_asteroids()'.
+        """
+
+        n = self.num_games
+        x_pos = self.rng.integers(-self.asteroid_margin_x, self.width + self.asteroid_margin_x + 1, n)
+        move_chose = self.rng.integers(0, 4, n)
+        x_mov = self.rng.integers(-1, 2, n)
+        self.last_draws = (x_pos, move_chose, x_mov)
+
+        spawn = self.clock > self.last_spawn + self.asteroid_buffer
+        if not spawn.any():
+            return
+        rows = np.flatnonzero(spawn)
+        slots = self.asteroid_alive[rows].sum(axis=1)
+        if slots.max() >= self.asteroid_alive.shape[1]:
+            self.asteroid_x, self.asteroid_y, self.asteroid_vx, self.asteroid_vy, self.asteroid_alive = _grow(
+                self.asteroid_x, self.asteroid_y, self.asteroid_vx, self.asteroid_vy, self.asteroid_alive)
+
+        self.asteroid_x[rows, slots] = x_pos[rows]
+        self.asteroid_y[rows, slots] = -self.asteroid_margin_y
+        self.asteroid_vx[rows, slots] = np.where(move_chose[rows] == 0, x_mov[rows], 0)
+        # Rect.move_ip() truncates a float speed toward zero
+        self.asteroid_vy[rows, slots] = np.trunc(self.asteroid_speed[rows]).astype(np.int64)
+        self.asteroid_alive[rows, slots] = True
+
+        self.last_spawn[rows] = self.clock[rows]
+        self.asteroid_buffer[rows] -= self.asteroid_buffer_decrease
+        self.asteroid_speed[rows] += self.asteroid_speed_increase
+
+    def remove_asteroids(self):
+        """Removes asteroids which have exited the bottom of the play area, and those beside the play area which
+        will exit the bottom before they could drift into it, the way 'Game.remove_asteroids()' does.
+        """
+
+        size = self.asteroid_size
+        reach = self.ship_size[0] + self.ship_lateral_speed
+        left = -reach
+        right = self.width + reach
+        centery = self.asteroid_y + size // 2
+
+        beside_left = self.asteroid_x + size <= left
+        inside = ~beside_left & (self.asteroid_x < right)
+        gap = np.where(beside_left, left - (self.asteroid_x + size), self.asteroid_x - right)
+        toward = np.where(beside_left, self.asteroid_vx > 0, self.asteroid_vx < 0)
+        ticks_to_enter = gap // np.maximum(np.abs(self.asteroid_vx), 1) + 1
+        ticks_to_exit = np.where(self.asteroid_vy > 0, (self.height - centery) // np.maximum(self.asteroid_vy, 1) + 1,
+                                 np.iinfo(np.int64).max)
+
+        self.asteroid_alive &= (centery <= self.height) & (inside | (toward & (ticks_to_enter < ticks_to_exit)))
+
+    def create_lasers(self, fire):
+        """Creates a new laser in every game where fire is held and enough time has elapsed since the last laser.
+
+        :param fire: a bool array of shape (num_games,).
+        """
+
+        fire = fire & (self.clock > self.last_fire + self.laser_buffer)
+        if not fire.any():
+            return
+        rows = np.flatnonzero(fire)
+        slots = self.laser_alive[rows].sum(axis=1)
+        if slots.max() >= self.laser_alive.shape[1]:
+            self.laser_x, self.laser_y, self.laser_alive = _grow(self.laser_x, self.laser_y, self.laser_alive)
+
+        ship_centerx = self.ship_x[rows] + self.ship_size[0] // 2
+        self.laser_x[rows, slots] = ship_centerx - self.laser_offset
+        self.laser_y[rows, slots] = self.ship_height - self.laser_offset
+        self.laser_alive[rows, slots] = True
+        self.last_fire[rows] = self.clock[rows]
+
+    def move_ships(self, actions):
+        """Moves every ship left and/or right, the way 'Game.update()' does.
+
+        :param actions: an int array of shape (num_games,).
+        """
+
+        half = self.ship_size[0] // 2
+        right = ((actions & RIGHT) != 0) & (self.ship_x + half < self.width)
+        self.ship_x += np.where(right, self.ship_lateral_speed, 0)
+        left = ((actions & LEFT) != 0) & (self.ship_x + half > 0)
+        self.ship_x -= np.where(left, self.ship_lateral_speed, 0)
+
+    def check_collision(self):
+        """Ends every game where an asteroid has collided with the ship. Then, in the order lasers were fired,
+        destroys the oldest asteroid each laser has collided with, the way 'Game.check_collision()' does.
+        """
+
+        size = self.asteroid_size
+        ship_hit = _overlap(self.asteroid_x, self.asteroid_y, size, size,
+                            self.ship_x[:, None], self.ship_height, self.ship_size[0], self.ship_size[1])
+        self.done |= (ship_hit & self.asteroid_alive).any(axis=1)
+
+        rows = np.arange(self.num_games)
+        for slot in range(self.laser_alive.shape[1]):
+            if not self.laser_alive[:, slot].any():
+                continue
+            hit = _overlap(self.asteroid_x, self.asteroid_y, size, size,
+                           self.laser_x[:, slot, None], self.laser_y[:, slot, None], *self.laser_size)
+            hit &= self.asteroid_alive & self.laser_alive[:, slot, None]
+            kill = hit.any(axis=1)
+            first = hit.argmax(axis=1)
+            self.asteroid_alive[rows[kill], first[kill]] = False
+            self.laser_alive[kill, slot] = False
+            self.score += kill
+
+    def observe(self):
+        """Returns the observation of every game.
+
+        :return: a dict of arrays: 'ship_x' (num_games,) the left edge of each ship; 'asteroids'
+        (num_games, nearby_asteroids, 2) the position of the nearest asteroid centres relative to the ship centre,
+        nearest first; 'asteroid_mask' (num_games, nearby_asteroids) True where an asteroid was found;
+        'score' (num_games,) and 'done' (num_games,).
+        """
+
+        k = self.nearby_asteroids
+        half = self.asteroid_size // 2
+        dx = self.asteroid_x + half - (self.ship_x[:, None] + self.ship_size[0] // 2)
+        dy = self.asteroid_y + half - (self.ship_height + self.ship_size[1] // 2)
+        distance = np.where(self.asteroid_alive, dx * dx + dy * dy, np.iinfo(np.int64).max)
+        if distance.shape[1] < k:
+            pad = ((0, 0), (0, k - distance.shape[1]))
+            distance = np.pad(distance, pad, constant_values=np.iinfo(np.int64).max)
+            dx, dy = np.pad(dx, pad), np.pad(dy, pad)
+        nearest = np.argsort(distance, axis=1, kind="stable")[:, :k]
+        mask = np.take_along_axis(distance, nearest, axis=1) != np.iinfo(np.int64).max
+        positions = np.stack((np.take_along_axis(dx, nearest, axis=1), np.take_along_axis(dy, nearest, axis=1)), -1)
+        positions[~mask] = 0
+        return {"ship_x": self.ship_x.copy(), "asteroids": positions.astype(np.float32), "asteroid_mask": mask,
+                "score": self.score.copy(), "done": self.done.copy()}
+
+
+def _overlap(x, y, w, h, other_x, other_y, other_w, other_h):
+    """Returns where the rectangles overlap, following the rules of pygame.Rect.colliderect()."""
+
+    return (x < other_x + other_w) & (other_x < x + w) & (y < other_y + other_h) & (other_y < y + h)
+
+
+def _compact(alive, *arrays):
+    """Moves the live entries of each row to the front, keeping their order.
+
+    :return: the reordered arrays, followed by the reordered 'alive' array.
+    """
+
+    order = np.argsort(~alive, axis=1, kind="stable")
+    return tuple(np.take_along_axis(array, order, axis=1) for array in arrays + (alive,))
+
+
+def _grow(*arrays):
+    """Doubles the amount of entity slots in each array."""
+
+    return tuple(np.concatenate((array, np.zeros_like(array)), axis=1) for array in arrays)
+
+
+def cross_check(num_games=4, ticks=3000, seed=0):
+    """Plays the same games with 'VectorGame' and with the object based 'Game' class, and checks that the ship,
+    every laser and asteroid, the score and the end of the game agree after every tick. The random values drawn by
+    'VectorGame' are fed to 'Game' in the order it asks for them.
+
+    :param num_games: an int representing the amount of games to compare.
+    :param ticks: an int representing the most ticks to play each game for.
+    :param seed: an int used to seed both the games and the random actions.
+    :return: the amount of ticks compared.
+    """
+
+    import os
+    import random
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import game as game_module
+    from graphic_support_mod import Window
+
+    window = Window('Asteroids cross check', 700, 700)
+    vector = VectorGame(num_games, window.get_width(), window.get_height(), seed=seed)
+    games = [game_module.Game(window) for i in range(num_games)]
+    action_rng = np.random.default_rng(seed)
+    compared = 0
+
+    class ReplayRandom(random.Random):
+        """Answers Game's calls to random.randint() with the values drawn by 'VectorGame'."""
+
+        def __init__(self, draws):
+            super().__init__()
+            self.draws = draws
+
+        def randint(self, a, b):
+            if (a, b) == (-vector.asteroid_margin_x, vector.width + vector.asteroid_margin_x):
+                return int(self.draws[0])
+            if (a, b) == (0, 3):
+                return int(self.draws[1])
+            if (a, b) == (-1, 1):
+                return int(self.draws[2])
+            return a  # Stars and asteroid spin do not take part in game play
+
+    saved_random = game_module.random
+    try:
+        for tick in range(ticks):
+            playing = [i for i in range(num_games) if games[i].continue_game]
+            if not playing:
+                break
+            actions = action_rng.choice([0, LEFT, RIGHT, FIRE, LEFT | FIRE, RIGHT | FIRE], num_games)
+            vector.step(actions)
+            for i in playing:
+                game = games[i]
+                game_module.random = ReplayRandom([draw[i] for draw in vector.last_draws])
+                game.pressed = {pygame.K_LEFT: bool(actions[i] & LEFT), pygame.K_RIGHT: bool(actions[i] & RIGHT),
+                                pygame.K_SPACE: bool(actions[i] & FIRE)}
+                game.update()
+                game.check_collision()
+                game.clock += 1
+
+                alive = vector.asteroid_alive[i]
+                expected = [tuple(asteroid.get_rect()[:2]) for asteroid in game.asteroid_list]
+                actual = list(zip(vector.asteroid_x[i][alive].tolist(), vector.asteroid_y[i][alive].tolist()))
+                assert actual == expected, "asteroids differ in game %d at tick %d" % (i, tick)
+                alive = vector.laser_alive[i]
+                expected = [tuple(laser.get_rect()[:2]) for laser in game.laser_list]
+                actual = list(zip(vector.laser_x[i][alive].tolist(), vector.laser_y[i][alive].tolist()))
+                assert actual == expected, "lasers differ in game %d at tick %d" % (i, tick)
+                assert vector.ship_x[i] == game.ship_rect.x, "ships differ in game %d at tick %d" % (i, tick)
+                assert vector.score[i] == game.score, "scores differ in game %d at tick %d" % (i, tick)
+                assert vector.done[i] == (not game.continue_game), "game %d ended differently at tick %d" % (i, tick)
+                compared += 1
+    finally:
+        game_module.random = saved_random
+        window.close()
+    return compared
+
+
+def benchmark(num_games=1024, ticks=1000, seed=0):
+    """Steps 'num_games' games with random actions for 'ticks' ticks.
+
+    :return: the amount of game ticks stepped per second.
+    """
+
+    vector = VectorGame(num_games, seed=seed)
+    actions = np.random.default_rng(seed).integers(0, 8, (ticks, num_games))
+    start = time.perf_counter()
+    for tick in range(ticks):
+        vector.step(actions[tick])
+    return num_games * ticks / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    print("cross check: %d game ticks agree with Game" % cross_check())
+    for num_games in (1, 64, 1024, 8192):
+        print("%5d games: %12.0f game ticks/s" % (num_games, benchmark(num_games, ticks=max(200, 20000 // num_games))))